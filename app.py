@@ -1,46 +1,75 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash
-from flask_session import Session
+from functools import wraps
 from datetime import datetime
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from dotenv import load_dotenv
-import bcrypt
-from werkzeug.utils import secure_filename
-import json
-
-# Load environment variables
-load_dotenv()
-
-app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-123')
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_PERMANENT'] = False
-app.config['UPLOAD_FOLDER'] = 'static/images/uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-
-# Ensure upload folder exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
-Session(app)
-
-# Database connection
-def get_db_connection():
-    conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
-    conn.autocommit = False
-    return conn
+from flask import Flask, current_app, render_template, request, redirect, url_for, session, jsonify, flash, make_response
+
+from utils import repository, statements, tasks
+from utils.cache import VersionedCache
+from utils.compression import compress_response
+from utils.jobs import enqueue
+from utils.database import get_db_connection
+
+# Heavy dependencies (psycopg2, bcrypt, werkzeug.utils, flask_session,
+# dotenv) are imported where they are used so that importing this module and
+# booting a worker stays cheap.
+
+def create_app(config_object='config'):
+    """Application factory: build and configure a Flask app instance."""
+    from dotenv import load_dotenv
+    from flask_session import Session
+
+    # Load environment variables before the config module reads them
+    load_dotenv()
+
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    Session(app)
+
+    register_routes(app)
+    app.after_request(compress_response)
+    app.cli.command('init-db')(init_db_command)
+    return app
+
+# Templates compiled ahead of the first request (see warm_up)
+WARM_TEMPLATES = (
+    'auth/login.html',
+    'auth/register.html',
+    'dashboard/index.html',
+    'dashboard/services.html',
+    'dashboard/menu.html',
+    'dashboard/cart.html',
+    'dashboard/orders.html',
+    'dashboard/profile.html',
+)
+
+def warm_up(app):
+    """Pre-compile the Jinja templates so the first request does not pay for it."""
+    for name in WARM_TEMPLATES:
+        app.jinja_env.get_template(name)
 
 # Database initialization
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'schema.sql')
+
 def init_db():
+    """Create or upgrade the schema. schema.sql is idempotent, so re-running
+    it on an existing database only adds what is missing."""
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            with open('database/schema.sql', 'r') as f:
+            with open(SCHEMA_PATH, 'r') as f:
                 cur.execute(f.read())
             conn.commit()
+        # The schema may have changed under already-prepared statements
+        statements.invalidate(conn)
+
+def init_db_command():
+    """Create or upgrade the database schema (safe to re-run)."""
+    import click
+
+    init_db()
+    click.echo('Database schema is up to date.')
 
 # Auth middleware
 def login_required(f):
-    from functools import wraps
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
@@ -48,35 +77,58 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Section rendering
+def wants_json():
+    return request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+def render_section(name, template, data, **context):
+    """Render a dashboard section for whoever asked for it.
+
+    - Accept: application/json  -> compact JSON built by data()
+    - HX-Request: true          -> just the section fragment (dashboard fetch)
+    - anything else             -> the full dashboard page with the section in it
+    """
+    if wants_json():
+        response = jsonify(data())
+    else:
+        html = render_template(template, **context)
+        if request.headers.get('HX-Request') != 'true':
+            html = render_template('dashboard/index.html', section=name, section_html=html)
+        response = make_response(html)
+    response.vary.update(('Accept', 'HX-Request'))
+    # Per-user content: the browser may keep it but must revalidate (ETag -> 304)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
 # Routes
-@app.route('/')
 def index():
     if 'user_id' in session:
         return redirect(url_for('dashboard'))
     return redirect(url_for('login'))
 
-@app.route('/login', methods=['GET', 'POST'])
 def login():
+    import bcrypt
+
     if request.method == 'POST':
         mobile = request.form.get('mobile')
         password = request.form.get('password')
         
         try:
             with get_db_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                with conn.cursor() as cur:
                     # Check if user exists
-                    cur.execute("SELECT * FROM users WHERE mobile = %s", (mobile,))
-                    user = cur.fetchone()
+                    user = repository.get_user_credentials(cur, mobile)
                     
                     if not user:
                         # Redirect to registration for new users
                         return redirect(url_for('register'))
                     
                     # Verify password
-                    if bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
-                        session['user_id'] = user['user_id']
-                        session['full_name'] = user['full_name']
-                        session['mobile'] = user['mobile']
+                    if bcrypt.checkpw(password.encode('utf-8'), user.password_hash.encode('utf-8')):
+                        session['user_id'] = user.user_id
+                        session['full_name'] = user.full_name
+                        session['mobile'] = user.mobile
                         return redirect(url_for('dashboard'))
                     else:
                         flash('Invalid password', 'error')
@@ -85,8 +137,11 @@ def login():
     
     return render_template('auth/login.html')
 
-@app.route('/register', methods=['GET', 'POST'])
 def register():
+    import bcrypt
+    import psycopg2
+    from werkzeug.utils import secure_filename
+
     if request.method == 'POST':
         mobile = request.form.get('mobile')
         password = request.form.get('password')
@@ -110,8 +165,10 @@ def register():
         if 'profile_pic' in request.files:
             file = request.files['profile_pic']
             if file and file.filename:
+                upload_folder = current_app.config['UPLOAD_FOLDER']
+                os.makedirs(upload_folder, exist_ok=True)
                 filename = secure_filename(f"{mobile}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg")
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+                file.save(os.path.join(upload_folder, filename))
                 profile_pic_url = f"uploads/{filename}"
         
         # Hash password
@@ -128,6 +185,12 @@ def register():
                     """, (mobile, hashed_password, full_name, email, 
                           profile_pic_url, lat, lng))
                     user_id = cur.fetchone()[0]
+                    
+                    # Resize the picture in the background worker, which
+                    # can only reach the file on shared storage
+                    if profile_pic_url != 'default.jpg' and current_app.config['SHARED_UPLOAD_STORAGE']:
+                        enqueue(cur, 'process_profile_pic', {'user_id': user_id, 'filename': filename})
+                    
                     conn.commit()
                     
                     # Auto login
@@ -143,118 +206,120 @@ def register():
     
     return render_template('auth/register.html')
 
-@app.route('/dashboard')
 @login_required
 def dashboard():
     return render_template('dashboard/index.html')
 
-@app.route('/services')
 @login_required
 def services():
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT * FROM services 
-                    WHERE is_active = TRUE 
-                    ORDER BY added_at DESC
-                """)
-                services_list = cur.fetchall()
-                
-                # Calculate final prices
-                for service in services_list:
-                    service['final_price'] = float(service['base_price']) - float(service['discount'])
-                
+            with conn.cursor() as cur:
+                services_list = repository.list_services(cur)
     except Exception as e:
+        # Still render the page, but leave a trace: an unmigrated database
+        # (no services.version column) would otherwise just look empty
+        current_app.logger.exception('Loading services failed')
         services_list = []
     
-    return render_template('dashboard/services.html', services=services_list)
+    return render_section('services', 'dashboard/services.html',
+                          lambda: {'services': [s.to_dict() for s in services_list]},
+                          services=services_list)
+
+# Service details (service + items) cached per (service_id, version)
+service_details_cache = VersionedCache(maxsize=512)
+MAX_BATCH_SERVICES = 50
+
+def load_service_details(requested):
+    """Details for {service_id: version or None}, from the cache where possible.
+
+    Everything not cached at the requested version is fetched in one query,
+    and cached under the version the database reports.
+    """
+    found = {}
+    missing = []
+    for service_id, version in requested.items():
+        data = service_details_cache.get(service_id, version) if version is not None else None
+        if data is None:
+            missing.append(service_id)
+        else:
+            found[service_id] = data
+    
+    if missing:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                for service_id, service in repository.get_service_details(cur, missing).items():
+                    data = service.to_dict()
+                    service_details_cache.put(service_id, service.version, data)
+                    found[service_id] = data
+    return found
 
-@app.route('/service/<int:service_id>')
 @login_required
 def service_details(service_id):
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Get service details
-                cur.execute("SELECT * FROM services WHERE service_id = %s", (service_id,))
-                service = cur.fetchone()
-                
-                if service:
-                    service['final_price'] = float(service['base_price']) - float(service['discount'])
-                    
-                    # Get service items
-                    cur.execute("""
-                        SELECT * FROM service_items 
-                        WHERE service_id = %s 
-                        ORDER BY serial_no
-                    """, (service_id,))
-                    items = cur.fetchall()
-                    service['items'] = items
-                
-                return jsonify({'service': service})
+        version = request.args.get('v', type=int)
+        service = load_service_details({service_id: version}).get(service_id)
+        return jsonify({'service': service})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/menu')
+@login_required
+def service_details_batch():
+    # ?ids=3:2,5:1,8 -> service ids, each optionally with the version the client saw
+    requested = {}
+    try:
+        for part in filter(None, request.args.get('ids', '').split(',')):
+            service_id, _, version = part.partition(':')
+            requested[int(service_id)] = int(version) if version else None
+    except ValueError:
+        return jsonify({'error': 'ids must look like 3:2,5:1'}), 400
+    if len(requested) > MAX_BATCH_SERVICES:
+        return jsonify({'error': f'At most {MAX_BATCH_SERVICES} services per request'}), 400
+    
+    try:
+        found = load_service_details(requested)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    response = jsonify({'services': [found[i] for i in requested if i in found]})
+    if requested and all(i in found and found[i]['version'] == v for i, v in requested.items()):
+        # The URL names exact versions, so the answer never changes
+        response.headers['Cache-Control'] = 'private, max-age=86400'
+    else:
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @login_required
 def menu():
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT * FROM menu_items 
-                    WHERE is_available = TRUE 
-                    ORDER BY serial_no
-                """)
-                menu_items = cur.fetchall()
-                
-                # Calculate final prices
-                for item in menu_items:
-                    item['final_price'] = float(item['base_price']) - float(item['discount'])
-                
+            with conn.cursor() as cur:
+                menu_items = repository.list_menu_items(cur)
     except Exception as e:
         menu_items = []
     
-    return render_template('dashboard/menu.html', menu_items=menu_items)
+    return render_section('menu', 'dashboard/menu.html',
+                          lambda: {'menu_items': [item.to_dict() for item in menu_items]},
+                          menu_items=menu_items)
 
-@app.route('/cart')
 @login_required
 def cart():
     user_id = session['user_id']
     
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Get cart items with details
-                cur.execute("""
-                    SELECT c.*, 
-                           s.service_name, s.image_url as service_image, s.base_price as service_price, s.discount as service_discount,
-                           m.item_name as menu_item_name, m.image_url as menu_image, m.base_price as menu_price, m.discount as menu_discount
-                    FROM cart c
-                    LEFT JOIN services s ON c.service_id = s.service_id AND c.item_type = 'service'
-                    LEFT JOIN menu_items m ON c.menu_id = m.menu_id AND c.item_type = 'menu'
-                    WHERE c.user_id = %s
-                    ORDER BY c.added_at DESC
-                """, (user_id,))
-                cart_items = cur.fetchall()
-                
-                # Calculate totals
-                subtotal = 0
-                for item in cart_items:
-                    if item['item_type'] == 'service':
-                        price = float(item['service_price']) - float(item['service_discount'])
-                    else:
-                        price = float(item['menu_price']) - float(item['menu_discount'])
-                    subtotal += price * item['quantity']
-                
+            with conn.cursor() as cur:
+                cart_items = repository.list_cart(cur, user_id)
+                subtotal = sum(item.line_total for item in cart_items)
     except Exception as e:
         cart_items = []
         subtotal = 0
     
-    return render_template('dashboard/cart.html', cart_items=cart_items, subtotal=subtotal)
+    return render_section('cart', 'dashboard/cart.html',
+                          lambda: {'items': [item.to_dict() for item in cart_items],
+                                   'subtotal': subtotal},
+                          cart_items=cart_items, subtotal=subtotal)
 
-@app.route('/add-to-cart', methods=['POST'])
 @login_required
 def add_to_cart():
     user_id = session['user_id']
@@ -268,7 +333,7 @@ def add_to_cart():
                 if item_type == 'service':
                     # Check if already in cart
                     cur.execute("""
-                        SELECT * FROM cart 
+                        SELECT cart_id FROM cart 
                         WHERE user_id = %s AND service_id = %s AND item_type = 'service'
                     """, (user_id, item_id))
                     existing = cur.fetchone()
@@ -289,7 +354,7 @@ def add_to_cart():
                 elif item_type == 'menu':
                     # Check if already in cart
                     cur.execute("""
-                        SELECT * FROM cart 
+                        SELECT cart_id FROM cart 
                         WHERE user_id = %s AND menu_id = %s AND item_type = 'menu'
                     """, (user_id, item_id))
                     existing = cur.fetchone()
@@ -312,7 +377,6 @@ def add_to_cart():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/update-cart/<int:cart_id>', methods=['POST'])
 @login_required
 def update_cart(cart_id):
     action = request.json.get('action')  # 'increase', 'decrease', 'remove'
@@ -340,7 +404,6 @@ def update_cart(cart_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/checkout', methods=['POST'])
 @login_required
 def checkout():
     user_id = session['user_id']
@@ -350,30 +413,14 @@ def checkout():
     
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor() as cur:
                 # Get cart items and calculate total
-                cur.execute("""
-                    SELECT c.*, 
-                           s.service_id, s.base_price as service_price, s.discount as service_discount,
-                           m.menu_id, m.base_price as menu_price, m.discount as menu_discount
-                    FROM cart c
-                    LEFT JOIN services s ON c.service_id = s.service_id AND c.item_type = 'service'
-                    LEFT JOIN menu_items m ON c.menu_id = m.menu_id AND c.item_type = 'menu'
-                    WHERE c.user_id = %s
-                """, (user_id,))
-                cart_items = cur.fetchall()
+                cart_items = repository.list_cart(cur, user_id)
                 
                 if not cart_items:
                     return jsonify({'error': 'Cart is empty'}), 400
                 
-                # Calculate total
-                total = 0
-                for item in cart_items:
-                    if item['item_type'] == 'service':
-                        price = float(item['service_price']) - float(item['service_discount'])
-                    else:
-                        price = float(item['menu_price']) - float(item['menu_discount'])
-                    total += price * item['quantity']
+                total = sum(item.line_total for item in cart_items)
                 
                 # Create order
                 cur.execute("""
@@ -382,133 +429,115 @@ def checkout():
                     VALUES (%s, %s, %s, %s, %s, 'pending')
                     RETURNING order_id
                 """, (user_id, total, lat, lng, payment_method))
-                order_id = cur.fetchone()['order_id']
+                order_id = cur.fetchone()[0]
                 
                 # Create order items
-                for item in cart_items:
-                    if item['item_type'] == 'service':
-                        price = float(item['service_price']) - float(item['service_discount'])
-                        cur.execute("""
-                            INSERT INTO order_items (order_id, service_id, item_type, quantity, price_at_time)
-                            VALUES (%s, %s, %s, %s, %s)
-                        """, (order_id, item['service_id'], 'service', item['quantity'], price))
-                    else:
-                        price = float(item['menu_price']) - float(item['menu_discount'])
-                        cur.execute("""
-                            INSERT INTO order_items (order_id, menu_id, item_type, quantity, price_at_time)
-                            VALUES (%s, %s, %s, %s, %s)
-                        """, (order_id, item['menu_id'], 'menu', item['quantity'], price))
+                cur.executemany("""
+                    INSERT INTO order_items (order_id, service_id, menu_id, item_type, quantity, price_at_time)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, [(order_id, item.service_id if item.item_type == 'service' else None,
+                       item.menu_id if item.item_type == 'menu' else None,
+                       item.item_type, item.quantity, item.unit_price)
+                      for item in cart_items])
                 
                 # Clear cart
                 cur.execute("DELETE FROM cart WHERE user_id = %s", (user_id,))
                 
+                # Status moves on (pending -> preparing -> ...) in the worker
+                tasks.schedule_order_step(cur, order_id)
+                
                 conn.commit()
                 return jsonify({'success': True, 'order_id': order_id})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/orders')
 @login_required
 def orders():
     user_id = session['user_id']
     
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Get current orders
-                cur.execute("""
-                    SELECT * FROM orders 
-                    WHERE user_id = %s AND status IN ('pending', 'preparing', 'delivery')
-                    ORDER BY order_date DESC
-                """, (user_id,))
-                current_orders = cur.fetchall()
-                
-                # Get past orders
-                cur.execute("""
-                    SELECT * FROM orders 
-                    WHERE user_id = %s AND status IN ('delivered', 'cancelled')
-                    ORDER BY order_date DESC
-                """, (user_id,))
-                past_orders = cur.fetchall()
-                
-                # Get order items for all orders
-                all_orders = current_orders + past_orders
-                order_ids = [order['order_id'] for order in all_orders]
-                
-                if order_ids:
-                    cur.execute("""
-                        SELECT oi.*, 
-                               s.service_name, s.image_url as service_image,
-                               m.item_name as menu_item_name, m.image_url as menu_image
-                        FROM order_items oi
-                        LEFT JOIN services s ON oi.service_id = s.service_id AND oi.item_type = 'service'
-                        LEFT JOIN menu_items m ON oi.menu_id = m.menu_id AND oi.item_type = 'menu'
-                        WHERE oi.order_id = ANY(%s)
-                    """, (order_ids,))
-                    order_items = cur.fetchall()
-                    
-                    # Group items by order_id
-                    items_by_order = {}
-                    for item in order_items:
-                        order_id = item['order_id']
-                        if order_id not in items_by_order:
-                            items_by_order[order_id] = []
-                        items_by_order[order_id].append(item)
-                else:
-                    items_by_order = {}
-                
+            with conn.cursor() as cur:
+                all_orders = repository.list_orders(cur, user_id)
+                items_by_order = repository.list_order_lines(
+                    cur, [order.order_id for order in all_orders])
+        
+        # Split into current and past, keeping the newest-first order
+        current_orders = [o for o in all_orders if o.status in repository.CURRENT_ORDER_STATUSES]
+        past_orders = [o for o in all_orders if o.status in repository.PAST_ORDER_STATUSES]
     except Exception as e:
         current_orders = []
         past_orders = []
         items_by_order = {}
     
-    return render_template('dashboard/orders.html', 
-                         current_orders=current_orders, 
-                         past_orders=past_orders,
-                         items_by_order=items_by_order)
+    def orders_json(orders_list):
+        return [dict(order.to_dict(),
+                     items=[item.to_dict() for item in items_by_order.get(order.order_id, [])])
+                for order in orders_list]
+    
+    return render_section('orders', 'dashboard/orders.html',
+                          lambda: {'current_orders': orders_json(current_orders),
+                                   'past_orders': orders_json(past_orders)},
+                          current_orders=current_orders, 
+                          past_orders=past_orders,
+                          items_by_order=items_by_order)
 
-@app.route('/profile')
 @login_required
 def profile():
     user_id = session['user_id']
     
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("SELECT * FROM users WHERE user_id = %s", (user_id,))
-                user = cur.fetchone()
+            with conn.cursor() as cur:
+                user = repository.get_user_profile(cur, user_id)
     except Exception as e:
         user = None
     
-    return render_template('dashboard/profile.html', user=user)
+    return render_section('profile', 'dashboard/profile.html',
+                          lambda: {'user': user.to_dict() if user else None},
+                          user=user)
 
-@app.route('/messages')
 @login_required
 def get_messages():
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT * FROM messages 
-                    WHERE is_active = TRUE 
-                    ORDER BY sent_at DESC 
-                    LIMIT 5
-                """)
-                messages = cur.fetchall()
-                return jsonify(messages)
+            with conn.cursor() as cur:
+                messages = repository.list_active_messages(cur)
+                return jsonify([message.to_dict() for message in messages])
     except Exception as e:
         return jsonify([])
 
-@app.route('/logout')
 def logout():
     session.clear()
     return redirect(url_for('login'))
 
+# URL map (endpoint names are the view function names used by url_for)
+def register_routes(app):
+    app.add_url_rule('/', view_func=index)
+    app.add_url_rule('/login', view_func=login, methods=['GET', 'POST'])
+    app.add_url_rule('/register', view_func=register, methods=['GET', 'POST'])
+    app.add_url_rule('/dashboard', view_func=dashboard)
+    app.add_url_rule('/services', view_func=services)
+    app.add_url_rule('/service/<int:service_id>', view_func=service_details)
+    app.add_url_rule('/service-details', view_func=service_details_batch)
+    app.add_url_rule('/menu', view_func=menu)
+    app.add_url_rule('/cart', view_func=cart)
+    app.add_url_rule('/add-to-cart', view_func=add_to_cart, methods=['POST'])
+    app.add_url_rule('/update-cart/<int:cart_id>', view_func=update_cart, methods=['POST'])
+    app.add_url_rule('/checkout', view_func=checkout, methods=['POST'])
+    app.add_url_rule('/orders', view_func=orders)
+    app.add_url_rule('/profile', view_func=profile)
+    app.add_url_rule('/messages', view_func=get_messages)
+    app.add_url_rule('/logout', view_func=logout)
+
 if __name__ == '__main__':
-    # Check if database needs initialization
-    if not os.path.exists('database/schema.sql'):
-        print("Creating database schema...")
+    app = create_app()
+
+    # Bring the development database up to date with schema.sql
+    try:
         init_db()
+    except Exception as e:
+        print(f"Could not apply database schema: {e}")
     
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_ENV') != 'production')
@@ -0,0 +1,119 @@
+"""
+Prepared statement benchmark: plain text queries vs PREPARE/EXECUTE.
+
+    DATABASE_URL=postgresql://... python benchmarks/bench_prepared.py
+    python benchmarks/bench_prepared.py --dsn postgresql://... -n 2000
+
+For every hot statement in the registry it reports the server-side planning
+time (from EXPLAIN ANALYZE) and the client-observed round trip per call, once
+sent as a plain query and once through utils.statements. Needs a database
+with the schema from database/schema.sql; sample parameters are taken from
+whatever rows exist.
+
+"plan plain" is the planning time of the query sent as text. "plan generic" is
+the planning time of EXECUTE once the cached generic plan exists, measured
+with plan_cache_mode = force_generic_plan (PostgreSQL 12+). Under the default
+mode Postgres builds a custom plan for each of the first five executions, and
+only after that may it switch to the generic plan.
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import repository, statements  # noqa: E402
+
+PLANNING_TIME = re.compile(r'Planning Time: ([\d.]+) ms')
+
+def sample_params(cur):
+    """Parameters for each registered statement, drawn from existing rows."""
+    cur.execute("SELECT mobile, user_id FROM users ORDER BY user_id LIMIT 1")
+    mobile, user_id = cur.fetchone() or ('0000000000', 0)
+    cur.execute("SELECT order_id FROM orders WHERE user_id = %s LIMIT 50", (user_id,))
+    order_ids = [row[0] for row in cur.fetchall()] or [0]
+    cur.execute("SELECT service_id FROM services ORDER BY service_id LIMIT 24")
+    service_ids = [row[0] for row in cur.fetchall()] or [0]
+    statuses = list(repository.CURRENT_ORDER_STATUSES + repository.PAST_ORDER_STATUSES)
+    return {
+        'user_by_mobile': (mobile,),
+        'services_catalog': (repository.DESCRIPTION_PREVIEW,),
+        'service_details': (service_ids,),
+        'menu_catalog': (repository.DESCRIPTION_PREVIEW,),
+        'cart_lines': (user_id,),
+        'orders_by_user': (user_id, statuses),
+        'order_lines': (order_ids,),
+    }
+
+def planning_ms(cur, sql, params):
+    cur.execute('EXPLAIN (ANALYZE, SUMMARY) ' + sql, params)
+    plan = '\n'.join(row[0] for row in cur.fetchall())
+    return float(PLANNING_TIME.search(plan).group(1))
+
+def generic_planning_ms(cur, statement, params):
+    cur.execute('SET plan_cache_mode = force_generic_plan')
+    try:
+        planning_ms(cur, statement.execute_sql, params)  # builds the generic plan
+        return planning_ms(cur, statement.execute_sql, params)
+    finally:
+        cur.execute('RESET plan_cache_mode')
+
+def per_call_us(n, run):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv(os.path.join(ROOT, '.env'))
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL'))
+    parser.add_argument('-n', '--calls', type=int, default=500)
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error('set DATABASE_URL or pass --dsn')
+
+    import psycopg2
+
+    conn = psycopg2.connect(args.dsn)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        params = sample_params(cur)
+        statements.invalidate(conn)
+
+        print(f'{"statement":<18}{"plan plain":>12}{"plan generic":>14}'
+              f'{"call plain":>13}{"call prep.":>13}{"speedup":>9}')
+        for name, statement in statements.registered().items():
+            if name not in params:
+                print(f'{name:<18}  (no sample parameters, skipped)')
+                continue
+            values = params[name]
+
+            def plain():
+                cur.execute(statement.sql, values)
+                cur.fetchall()
+
+            def prepared():
+                statements.execute(cur, statement, values)
+                cur.fetchall()
+
+            prepared()  # PREPARE once; everything below measures EXECUTE only
+            plan_plain = planning_ms(cur, statement.sql, values)
+            plan_prepared = generic_planning_ms(cur, statement, values)
+            call_plain = per_call_us(args.calls, plain)
+            call_prepared = per_call_us(args.calls, prepared)
+            print(f'{name:<18}{plan_plain:>9.3f} ms{plan_prepared:>11.3f} ms'
+                  f'{call_plain:>10.0f} us{call_prepared:>10.0f} us'
+                  f'{call_plain / call_prepared:>8.2f}x')
+    conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Row representation benchmark: RealDictCursor-style dicts vs repository rows.
+
+    python benchmarks/bench_rows.py                 # synthetic rows, no database
+    python benchmarks/bench_rows.py --rows 50000
+    python benchmarks/bench_rows.py --live          # also query DATABASE_URL
+
+For a large catalog (services list page) and a long order history it reports
+retained memory (tracemalloc), row build time, and the time to render the real
+templates from each representation. The "dict" side reproduces the old views:
+every column of SELECT * in a dict, with final_price written back into it.
+Build time includes decoding the values, as psycopg2 would.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import repository  # noqa: E402
+
+DESCRIPTION = ('Perfect for 4-5 people with a variety of dishes, sides, '
+               'desserts and drinks, freshly prepared by our partner kitchens. ') * 4
+IMAGE_URL = 'https://images.unsplash.com/photo-1565299624946-b28f40a0ae38?w=400'
+
+# Text arrives from the server as bytes and psycopg2 decodes a new str per
+# value; decoding here too keeps both sides paying for the strings they hold.
+_DESCRIPTION = DESCRIPTION.encode()
+_PREVIEW = DESCRIPTION[:repository.DESCRIPTION_PREVIEW].encode()
+_IMAGE_URL = IMAGE_URL.encode()
+_EPOCH = datetime(2026, 1, 1)
+
+# -- fetchers: simulate the driver and return what the view hands to its template
+
+def fetch_services_dicts(n):
+    """SELECT * through RealDictCursor, then final_price written into each row."""
+    rows = [{
+        'service_id': i, 'version': 1, 'service_name': f'Service {i}', 'category': b'Combo'.decode(),
+        'base_price': Decimal('1299.00'), 'discount': Decimal('200.00'),
+        'image_url': _IMAGE_URL.decode(), 'description': _DESCRIPTION.decode(),
+        'added_at': _EPOCH - timedelta(minutes=i), 'available_until': None, 'is_active': True,
+    } for i in range(n)]
+    for row in rows:
+        row['final_price'] = float(row['base_price']) - float(row['discount'])
+        row['description_preview'] = row['description']
+    return rows
+
+def fetch_services_rows(n):
+    """repository.list_services: needed columns only, description preview."""
+    return list(map(repository.ServiceSummary._make, (
+        (i, 1, f'Service {i}', Decimal('1299.00'), Decimal('200.00'), _IMAGE_URL.decode(),
+         _PREVIEW.decode(), _EPOCH - timedelta(minutes=i), None) for i in range(n))))
+
+def fetch_orders_dicts(n, per_order=3):
+    orders = [{
+        'order_id': i, 'user_id': 1, 'order_date': _EPOCH - timedelta(hours=i),
+        'total_amount': Decimal('1548.00'), 'status': b'delivered'.decode(),
+        'delivery_lat': Decimal('12.97160000'), 'delivery_lng': Decimal('77.59460000'),
+        'payment_method': b'upi'.decode(), 'payment_status': b'paid'.decode(),
+    } for i in range(n)]
+    items_by_order = {}
+    for i in range(n):
+        for k in range(per_order):
+            items_by_order.setdefault(i, []).append({
+                'order_item_id': i * per_order + k, 'order_id': i, 'service_id': k,
+                'menu_id': None, 'item_type': b'service'.decode(), 'quantity': 2,
+                'price_at_time': Decimal('1099.00'), 'service_name': f'Service {k}',
+                'service_image': _IMAGE_URL.decode(), 'menu_item_name': None, 'menu_image': None,
+            })
+    # The keys the template reads, as the old view would have had to add them
+    for items in items_by_order.values():
+        for item in items:
+            item['name'] = item['service_name'] or item['menu_item_name']
+            item['line_total'] = item['price_at_time'] * item['quantity']
+    return orders, items_by_order
+
+def fetch_orders_rows(n, per_order=3):
+    orders = list(map(repository.Order._make, (
+        (i, _EPOCH - timedelta(hours=i), b'delivered'.decode(), Decimal('1548.00'),
+         b'upi'.decode(), b'paid'.decode(), Decimal('12.97160000'), Decimal('77.59460000'))
+        for i in range(n))))
+    items_by_order = {}
+    for line in map(repository.OrderLine._make, (
+            (i, b'service'.decode(), 2, Decimal('1099.00'), f'Service {k}', _IMAGE_URL.decode())
+            for i in range(n) for k in range(per_order))):
+        items_by_order.setdefault(line.order_id, []).append(line)
+    return orders, items_by_order
+
+def retained(build, *args):
+    """Bytes still allocated after build() returns, and its wall time."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(*args)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+def best_of(repeat, fn, *args, **kwargs):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def report(title, n, old, new):
+    (old_size, old_build, old_render), (new_size, new_build, new_render) = old, new
+    print(f'\n-- {title} ({n:,} rows)')
+    print(f'{"":<22}{"dict rows":>14}{"repository":>14}{"ratio":>8}')
+    for label, a, b, unit, scale in (
+            ('retained memory', old_size, new_size, 'MB', 1 / 2 ** 20),
+            ('build', old_build, new_build, 'ms', 1000),
+            ('render template', old_render, new_render, 'ms', 1000)):
+        print(f'{label:<22}{a * scale:>11.2f} {unit}{b * scale:>11.2f} {unit}{a / b:>7.2f}x')
+
+def bench_synthetic(rows, repeat):
+    from flask import render_template
+    from app import create_app
+
+    app = create_app()
+
+    old, old_size, old_build = retained(fetch_services_dicts, rows)
+    new, new_size, new_build = retained(fetch_services_rows, rows)
+    with app.test_request_context():
+        old_render = best_of(repeat, render_template, 'dashboard/services.html', services=old)
+        new_render = best_of(repeat, render_template, 'dashboard/services.html', services=new)
+    report('services catalog', rows, (old_size, old_build, old_render),
+           (new_size, new_build, new_render))
+    del old, new
+
+    (old_orders, old_items), old_size, old_build = retained(fetch_orders_dicts, rows)
+    (new_orders, new_items), new_size, new_build = retained(fetch_orders_rows, rows)
+    with app.test_request_context():
+        old_render = best_of(repeat, render_template, 'dashboard/orders.html',
+                             current_orders=[], past_orders=old_orders, items_by_order=old_items)
+        new_render = best_of(repeat, render_template, 'dashboard/orders.html',
+                             current_orders=[], past_orders=new_orders, items_by_order=new_items)
+    report('order history (3 items each)', rows, (old_size, old_build, old_render),
+           (new_size, new_build, new_render))
+
+def bench_live(repeat):
+    """Fetch the real catalog both ways from DATABASE_URL."""
+    from psycopg2.extras import RealDictCursor
+    from utils.database import get_db_connection
+
+    def old_fetch(conn):
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("SELECT * FROM services WHERE is_active = TRUE ORDER BY added_at DESC")
+            rows = cur.fetchall()
+            for row in rows:
+                row['final_price'] = float(row['base_price']) - float(row['discount'])
+            return rows
+
+    def new_fetch(conn):
+        with conn.cursor() as cur:
+            return repository.list_services(cur)
+
+    with get_db_connection() as conn:
+        n = len(new_fetch(conn))
+        old = best_of(repeat, old_fetch, conn)
+        new = best_of(repeat, new_fetch, conn)
+    print(f'\n-- live services query ({n:,} rows)')
+    print(f'SELECT * + RealDictCursor {old * 1000:9.2f} ms')
+    print(f'repository.list_services  {new * 1000:9.2f} ms   ({old / new:.2f}x)')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--live', action='store_true',
+                        help='also compare both fetch paths against DATABASE_URL')
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    bench_synthetic(args.rows, args.repeat)
+    if args.live:
+        bench_live(args.repeat)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Dashboard section benchmark: bytes and server time per navigation.
+
+    python benchmarks/bench_sections.py
+    python benchmarks/bench_sections.py --rows 100 -n 200
+
+Requests /services, /menu, /cart and /orders through the Flask test client
+in each representation the views can return:
+
+    page       plain navigation: full dashboard page with the section inside
+    fragment   HX-Request: true, what the dashboard's fetch() asks for
+    json       Accept: application/json
+
+each with and without gzip, plus a revalidation that answers 304. The
+database is replaced by canned repository rows so only rendering,
+serialization and compression are measured.
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app as app_module  # noqa: E402
+from utils import repository  # noqa: E402
+
+DESCRIPTION = 'Fresh vegetables with protein of choice, dressing on the side. ' * 2
+IMAGE_URL = 'https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=400'
+EPOCH = datetime(2026, 1, 1)
+
+def canned_repository(rows):
+    """Point the repository functions the views use at synthetic rows."""
+    services = [repository.ServiceSummary(
+        i, 1, f'Service {i}', Decimal('499.00'), Decimal('50.00'), IMAGE_URL,
+        DESCRIPTION[:repository.DESCRIPTION_PREVIEW], EPOCH - timedelta(hours=i), None)
+        for i in range(rows)]
+    menu = [repository.MenuItem(
+        i, f'Item {i}', Decimal('199.00'), Decimal('20.00'), IMAGE_URL,
+        DESCRIPTION[:repository.DESCRIPTION_PREVIEW], EPOCH - timedelta(hours=i))
+        for i in range(rows)]
+    cart = [repository.CartLine(
+        i, 'menu', None, i, 2, f'Item {i}', IMAGE_URL, Decimal('199.00'), Decimal('20.00'))
+        for i in range(min(rows, 20))]
+    statuses = repository.CURRENT_ORDER_STATUSES + repository.PAST_ORDER_STATUSES
+    orders = [repository.Order(
+        i, EPOCH - timedelta(days=i), statuses[i % len(statuses)], Decimal('1099.00'),
+        'upi', 'paid', Decimal('12.97160000'), Decimal('77.59460000'))
+        for i in range(rows)]
+    lines = {order.order_id: [repository.OrderLine(
+        order.order_id, 'service', 1, Decimal('449.00'), f'Service {k}', IMAGE_URL)
+        for k in range(3)] for order in orders}
+
+    repository.list_services = lambda cur: services
+    repository.list_menu_items = lambda cur: menu
+    repository.list_cart = lambda cur, user_id: cart
+    repository.list_orders = lambda cur, user_id: orders
+    repository.list_order_lines = lambda cur, order_ids: lines
+
+    class Connection:
+        def cursor(self, **kwargs):
+            return contextlib.nullcontext()
+
+    app_module.get_db_connection = lambda: contextlib.nullcontext(Connection())
+
+MODES = {
+    'page': {},
+    'fragment': {'HX-Request': 'true'},
+    'json': {'Accept': 'application/json'},
+}
+
+def measure(client, path, headers, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        samples.append(time.perf_counter() - start)
+    assert response.status_code in (200, 304), (path, response.status_code)
+    return len(response.data), statistics.median(samples) * 1000, response
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=24, help='catalog/order rows per section')
+    parser.add_argument('-n', '--requests', type=int, default=100)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    canned_repository(args.rows)
+    app = app_module.create_app()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['full_name'] = 'Benchmark User'
+
+    print(f'{"section":<10}{"mode":<10}{"bytes":>10}{"gzip bytes":>12}{"ms":>8}{"gzip ms":>9}')
+    for section in ('services', 'menu', 'cart', 'orders'):
+        path = f'/{section}'
+        for mode, headers in MODES.items():
+            size, ms, _ = measure(client, path, headers, args.requests)
+            gz_size, gz_ms, response = measure(
+                client, path, dict(headers, **{'Accept-Encoding': 'gzip'}), args.requests)
+            print(f'{section:<10}{mode:<10}{size:>10,}{gz_size:>12,}{ms:>8.2f}{gz_ms:>9.2f}')
+            if mode == 'fragment':
+                etag = response.headers['ETag']
+        # Revisiting a section whose content has not changed
+        size, ms, response = measure(client, path, dict(MODES['fragment'], **{
+            'Accept-Encoding': 'gzip', 'If-None-Match': etag}), args.requests)
+        print(f'{section:<10}{"304":<10}{size:>10,}{"":>12}{ms:>8.2f}   ({response.status_code})')
+
+if __name__ == '__main__':
+    main()
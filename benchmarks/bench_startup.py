@@ -0,0 +1,103 @@
+"""
+Startup benchmark: time from a cold interpreter to the first served request.
+
+    python benchmarks/bench_startup.py              # in-process phases
+    python benchmarks/bench_startup.py --gunicorn   # also a real gunicorn boot
+
+Each run uses a fresh interpreter so module import caches do not carry over.
+The measured request is GET /login, which renders a template but needs no
+database, so the numbers isolate import, factory and first-render cost.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter and prints one JSON line of timings
+PROBE = r'''
+import json, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+app = app_module.create_app()
+t2 = time.perf_counter()
+if WARM:
+    app_module.warm_up(app)
+t3 = time.perf_counter()
+client = app.test_client()
+assert client.get('/login').status_code == 200
+t4 = time.perf_counter()
+assert client.get('/login').status_code == 200
+t5 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'warm_up': t3 - t2,
+                  'first_request': t4 - t3, 'second_request': t5 - t4, 'total': t4 - t0}))
+'''
+
+def run_probe(warm):
+    code = f'WARM = {warm!r}\n' + PROBE
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def run_gunicorn(preload):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), GUNICORN_PRELOAD=str(preload),
+               WEB_CONCURRENCY='2', GUNICORN_LOG_LEVEL='warning')
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                             'app:create_app()'],
+                            cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/login', timeout=1).read()
+                return time.perf_counter() - start
+            except OSError:
+                if proc.poll() is not None:
+                    raise RuntimeError('gunicorn exited during startup')
+                if time.perf_counter() - start > 30:
+                    raise RuntimeError('gunicorn did not answer within 30s')
+                time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def summarize(label, samples):
+    print(f'{label:<28} median {statistics.median(samples) * 1000:8.1f} ms'
+          f'   min {min(samples) * 1000:8.1f} ms')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=10)
+    parser.add_argument('--gunicorn', action='store_true',
+                        help='also measure a full gunicorn boot (preload on and off)')
+    args = parser.parse_args()
+
+    for warm in (False, True):
+        runs = [run_probe(warm) for _ in range(args.runs)]
+        print(f'\n-- in-process, warm_up={warm} ({args.runs} runs)')
+        for phase in ('import', 'create_app', 'warm_up', 'first_request',
+                      'second_request', 'total'):
+            summarize(phase, [r[phase] for r in runs])
+
+    if args.gunicorn:
+        for preload in (True, False):
+            samples = [run_gunicorn(preload) for _ in range(max(1, args.runs // 2))]
+            print(f'\n-- gunicorn, preload_app={preload}')
+            summarize('spawn to first response', samples)
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,8 @@
 """
 Application Configuration
+
+Loaded by create_app() via app.config.from_object('config'), after .env has
+been read, so every value here can be overridden from the environment.
 """
 import os
 
@@ -7,16 +10,21 @@ import os
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
 # Secret key
-SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-123')
+
+# Sessions (Flask-Session)
+SESSION_TYPE = 'filesystem'
+SESSION_PERMANENT = False
 
-# Database
-SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 
-    f'sqlite:///{os.path.join(BASE_DIR, "bitebuddy.db")}')
-SQLALCHEMY_TRACK_MODIFICATIONS = False
+# Database (see utils/database.py for the per-process connection pool)
+DATABASE_URL = os.environ.get('DATABASE_URL')
 
-# Upload settings
-UPLOAD_FOLDER = os.path.join(BASE_DIR, 'static', 'uploads')
+# Upload settings (the folder is created on first upload, not at import)
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER',
+    os.path.join(BASE_DIR, 'static', 'images', 'uploads'))
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
 
-# Create upload folder
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Set when the job worker sees the same UPLOAD_FOLDER as the web process (same
+# host or a shared volume); only then are uploaded profile pictures queued for
+# resizing. Otherwise they are kept as uploaded.
+SHARED_UPLOAD_STORAGE = os.environ.get('SHARED_UPLOAD_STORAGE', 'false').strip().lower() in ('1', 'true', 'yes', 'on')
@@ -43,6 +43,34 @@ CREATE TABLE IF NOT EXISTS service_items (
 -- Create index for service items
 CREATE INDEX IF NOT EXISTS idx_service ON service_items(service_id);
 
+-- Service versions: bumped on every change to a service or its items, so
+-- clients and the app can cache service details per (service_id, version)
+ALTER TABLE services ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 1;
+
+CREATE OR REPLACE FUNCTION bump_service_version() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'services' THEN
+        NEW.version := OLD.version + 1;
+        RETURN NEW;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        UPDATE services SET version = version + 1 WHERE service_id = OLD.service_id;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        UPDATE services SET version = version + 1 WHERE service_id = NEW.service_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_services_version ON services;
+CREATE TRIGGER trg_services_version BEFORE UPDATE ON services
+    FOR EACH ROW EXECUTE FUNCTION bump_service_version();
+
+DROP TRIGGER IF EXISTS trg_service_items_version ON service_items;
+CREATE TRIGGER trg_service_items_version AFTER INSERT OR UPDATE OR DELETE ON service_items
+    FOR EACH ROW EXECUTE FUNCTION bump_service_version();
+
 -- Table 4: menu_items (Global menu)
 CREATE TABLE IF NOT EXISTS menu_items (
     menu_id SERIAL PRIMARY KEY,
@@ -108,20 +136,50 @@ CREATE TABLE IF NOT EXISTS messages (
     is_active BOOLEAN DEFAULT TRUE
 );
 
--- Insert sample data (remove in production or keep for demo)
-INSERT INTO services (service_name, category, base_price, discount, description, image_url, is_active) VALUES
+-- Table 9: jobs (Background job queue, see utils/jobs.py)
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    status VARCHAR(10) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued','running','done','dead')),
+    attempts INT NOT NULL DEFAULT 0,
+    max_attempts INT NOT NULL DEFAULT 5,
+    run_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_by VARCHAR(100),
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create indexes for claiming ready jobs and reclaiming stuck ones
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(run_at) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_jobs_running ON jobs(started_at) WHERE status = 'running';
+
+-- Insert sample data (remove in production or keep for demo). Each table is
+-- only seeded while empty, so this file can be re-run to upgrade a database.
+INSERT INTO services (service_name, category, base_price, discount, description, image_url, is_active)
+SELECT * FROM (VALUES
 ('Family Feast Combo', 'Combo', 1299.00, 200.00, 'Perfect for 4-5 people with variety of dishes', 'https://images.unsplash.com/photo-1565299624946-b28f40a0ae38?w=400', TRUE),
 ('Weekend Special Pizza', 'Pizza', 499.00, 50.00, 'Large pizza with 4 toppings of your choice', 'https://images.unsplash.com/photo-1565299624946-b28f40a0ae38?w-400', TRUE),
 ('Healthy Salad Bowl', 'Salad', 299.00, 20.00, 'Fresh vegetables with protein of choice', 'https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=400', TRUE),
-('Burger Meal Deal', 'Fast Food', 349.00, 40.00, 'Burger with fries and drink', 'https://images.unsplash.com/photo-1571091718767-18b5b14568ad?w=400', TRUE);
+('Burger Meal Deal', 'Fast Food', 349.00, 40.00, 'Burger with fries and drink', 'https://images.unsplash.com/photo-1571091718767-18b5b14568ad?w=400', TRUE)
+) AS seed (service_name, category, base_price, discount, description, image_url, is_active)
+WHERE NOT EXISTS (SELECT 1 FROM services);
 
-INSERT INTO menu_items (item_name, base_price, discount, description, image_url, serial_no, is_available) VALUES
+INSERT INTO menu_items (item_name, base_price, discount, description, image_url, serial_no, is_available)
+SELECT * FROM (VALUES
 ('Margherita Pizza', 299.00, 30.00, 'Classic cheese pizza with tomato sauce', 'https://images.unsplash.com/photo-1565299624946-b28f40a0ae38?w=400', 1, TRUE),
 ('Chicken Burger', 199.00, 20.00, 'Grilled chicken burger with veggies', 'https://images.unsplash.com/photo-1571091718767-18b5b14568ad?w=400', 2, TRUE),
 ('Caesar Salad', 249.00, 25.00, 'Fresh salad with caesar dressing', 'https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=400', 3, TRUE),
-('French Fries', 99.00, 0.00, 'Crispy golden fries', 'https://images.unsplash.com/photo-1573080496219-bb080dd4f877?w=400', 4, TRUE);
+('French Fries', 99.00, 0.00, 'Crispy golden fries', 'https://images.unsplash.com/photo-1573080496219-bb080dd4f877?w=400', 4, TRUE)
+) AS seed (item_name, base_price, discount, description, image_url, serial_no, is_available)
+WHERE NOT EXISTS (SELECT 1 FROM menu_items);
 
-INSERT INTO messages (sender_name, message_text, message_image, is_active) VALUES
+INSERT INTO messages (sender_name, message_text, message_image, is_active)
+SELECT * FROM (VALUES
 ('BiteMeBuddy', 'Welcome to BiteMeBuddy! Enjoy 20% off on your first order.', NULL, TRUE),
 ('BiteMeBuddy', 'New menu items added! Check out our specials.', NULL, TRUE),
-('BiteMeBuddy', 'Weekend special: Free delivery on orders above ₹499', NULL, TRUE);
+('BiteMeBuddy', 'Weekend special: Free delivery on orders above ₹499', NULL, TRUE)
+) AS seed (sender_name, message_text, message_image, is_active)
+WHERE NOT EXISTS (SELECT 1 FROM messages);
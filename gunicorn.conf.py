@@ -0,0 +1,102 @@
+"""
+Gunicorn Configuration
+
+Start with:  gunicorn -c gunicorn.conf.py "app:create_app()"
+
+Every setting can be overridden from the environment (WEB_CONCURRENCY,
+GUNICORN_THREADS, GUNICORN_PRELOAD, ...), which is how Render sizes it;
+values in .env are read too. Whatever the sizing, workers x threads is
+capped at DB_MAX_CONNECTIONS, since each thread may hold its own Postgres
+connection.
+"""
+import math
+import os
+
+from dotenv import load_dotenv
+
+# This file is evaluated before the app is imported, so load .env here for
+# the settings below; real environment variables still take precedence.
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'))
+
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)).strip().lower() in ('1', 'true', 'yes', 'on')
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+def _available_cpus():
+    """CPUs this container may use: affinity, limited by any cgroup CPU quota.
+
+    os.cpu_count() reports the host's CPUs, which on a small container
+    instance can be many times what it is allowed to use.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    quota = _read('/sys/fs/cgroup/cpu.max')  # cgroup v2: "<quota|max> <period>"
+    if quota is None:  # cgroup v1
+        quota = (_read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') or []) + \
+                (_read('/sys/fs/cgroup/cpu/cpu.cfs_period_us') or [])
+    if len(quota) == 2 and quota[0] not in ('max', '-1'):
+        cpus = min(cpus, math.ceil(int(quota[0]) / int(quota[1])))
+    return max(cpus, 1)
+
+_cpus = _available_cpus()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Requests mostly wait on Postgres, so a few processes with a thread pool each
+# beat many single-threaded sync workers (and use far less memory).
+workers = int(os.environ.get('WEB_CONCURRENCY', min(_cpus * 2 + 1, 8)))
+threads = int(os.environ.get('GUNICORN_THREADS', max(2, min(_cpus * 2, 8))))
+
+# Every thread may hold a pooled connection (see post_fork). Leave headroom
+# below the server's max_connections for the job worker and admin sessions.
+db_max_connections = int(os.environ.get('DB_MAX_CONNECTIONS', 20))
+workers = max(1, min(workers, db_max_connections))
+threads = max(1, min(threads, db_max_connections // workers))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Import the app once in the master and fork it, so workers share its pages
+# copy-on-write and boot instantly. Nothing may touch the database before the
+# fork; each worker opens its own pool in post_fork.
+preload_app = _env_bool('GUNICORN_PRELOAD', True)
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to cap slow memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+def when_ready(server):
+    # With preload the app already lives in the master: compile templates once
+    # here so every forked worker inherits the warm Jinja cache.
+    if server.cfg.preload_app:
+        from app import warm_up
+        warm_up(server.app.wsgi())
+
+def post_fork(server, worker):
+    # One pool per worker, sized so every thread can hold a connection
+    from utils.database import init_pool
+    try:
+        init_pool(minconn=1, maxconn=server.cfg.threads)
+    except Exception as e:
+        # Keep the worker up; the pool is retried lazily on first use
+        worker.log.warning("Could not open database pool: %s", e)
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        from app import warm_up
+        warm_up(worker.wsgi)
+
+def worker_exit(server, worker):
+    from utils.database import close_pool
+    close_pool()
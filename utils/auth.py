@@ -18,13 +18,14 @@ def login_required(f):
     return decorated_function
 
 def get_current_user():
-    from app import get_db_connection
+    from utils import repository
+    from utils.database import get_db_connection
+
     if 'user_id' in session:
         try:
             with get_db_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                    cur.execute("SELECT * FROM users WHERE user_id = %s", (session['user_id'],))
-                    return cur.fetchone()
+                with conn.cursor() as cur:
+                    return repository.get_user_profile(cur, session['user_id'])
         except:
             return None
     return None
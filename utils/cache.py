@@ -0,0 +1,47 @@
+"""
+Small in-process caches.
+
+Each gunicorn worker holds its own copy; nothing here is shared between
+processes, so entries must be safe to serve until their key changes.
+"""
+import threading
+from collections import OrderedDict
+
+class VersionedCache:
+    """LRU of values keyed by (id, version).
+
+    Only the newest version seen for an id is kept. A lookup for any other
+    version misses, so bumping an id's version in the database invalidates
+    it here without any explicit purge.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value):
+        with self._lock:
+            current = self._data.get(key)
+            if current is not None and current[0] > version:
+                return
+            self._data[key] = (version, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
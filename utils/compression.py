@@ -0,0 +1,37 @@
+"""
+Gzip for dynamic HTML and JSON responses.
+
+Registered as an after_request hook in create_app(). Streamed and file
+responses (static assets) are left alone, as are bodies too small to gain
+anything and clients that do not accept gzip.
+"""
+import gzip
+
+COMPRESSIBLE_MIMETYPES = {'text/html', 'application/json', 'text/css',
+                          'text/javascript', 'application/javascript'}
+MIN_SIZE = 500
+COMPRESS_LEVEL = 6
+
+def compress_response(response):
+    from flask import request
+
+    response.vary.add('Accept-Encoding')
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'gzip' not in request.accept_encodings):
+        return response
+
+    data = response.get_data()
+    if len(data) < MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    # The compressed body is a different byte sequence, so a strong ETag taken
+    # from the plain body may only be reused as a weak one.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
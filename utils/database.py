@@ -1,37 +1,42 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
 import os
 from contextlib import contextmanager
 
-@contextmanager
-def get_db():
-    conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
-    conn.autocommit = False
-    try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            yield cur
-            conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+# One connection pool per process. Pools must never cross a fork: sockets
+# opened in the gunicorn master would be shared by every worker, so the pool
+# is created lazily and re-created whenever the current pid changes.
+_pool = None
+_pool_pid = None
+
+def init_pool(minconn=None, maxconn=None, dsn=None):
+    global _pool, _pool_pid
+    from psycopg2.pool import ThreadedConnectionPool
 
-def execute_query(query, params=None):
-    with get_db() as cur:
-        cur.execute(query, params or ())
-        if query.strip().upper().startswith('SELECT'):
-            return cur.fetchall()
-        elif query.strip().upper().startswith('INSERT'):
-            cur.execute("SELECT LASTVAL()")
-            return cur.fetchone()['lastval']
+    minconn = minconn if minconn is not None else int(os.environ.get('DB_POOL_MIN', 1))
+    maxconn = maxconn if maxconn is not None else int(os.environ.get('DB_POOL_MAX', 10))
+    _pool = ThreadedConnectionPool(max(minconn, 0), max(minconn, maxconn, 1),
+                                   dsn or os.environ.get('DATABASE_URL'))
+    _pool_pid = os.getpid()
+    return _pool
 
-def fetch_one(query, params=None):
-    with get_db() as cur:
-        cur.execute(query, params or ())
-        return cur.fetchone()
+def get_pool():
+    if _pool is None or _pool_pid != os.getpid():
+        init_pool()
+    return _pool
 
-def fetch_all(query, params=None):
-    with get_db() as cur:
-        cur.execute(query, params or ())
-        return cur.fetchall()
+def close_pool():
+    global _pool, _pool_pid
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.closeall()
+    _pool = None
+    _pool_pid = None
+
+@contextmanager
+def get_db_connection():
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        # Commits on success, rolls back if the block raises
+        with conn:
+            yield conn
+    finally:
+        pool.putconn(conn, close=bool(conn.closed))
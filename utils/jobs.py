@@ -0,0 +1,186 @@
+"""
+Durable background jobs on a Postgres table.
+
+Request handlers call enqueue() inside their own transaction, so a job exists
+exactly when the work that asked for it was committed. Workers (worker.py)
+claim ready jobs in batches with FOR UPDATE SKIP LOCKED, so any number of
+them can share the table without blocking each other or taking the same job.
+
+Each job runs its handler and is marked done in one transaction, so database
+side effects of a handler commit together with its completion. A failing job
+goes back to the queue with exponential backoff; once it has used up
+max_attempts it is parked as 'dead' for inspection (see requeue_dead). A job
+whose worker died mid-run is picked up again after LOCK_TIMEOUT, or parked as
+dead if that run was its last attempt, so a job that keeps killing its worker
+does not loop forever.
+"""
+import logging
+import random
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'jobs'
+
+# Retry delay after the n-th failed attempt: RETRY_BASE * 2**(n-1), capped
+RETRY_BASE_SECONDS = 10
+RETRY_MAX_SECONDS = 3600
+DEFAULT_MAX_ATTEMPTS = 5
+
+# A running job whose worker has been silent this long is assumed lost
+LOCK_TIMEOUT_SECONDS = 600
+
+Job = namedtuple('Job', 'job_id kind payload attempts max_attempts run_at started_at')
+
+_handlers = {}
+
+def handler(kind):
+    """Register the function that runs jobs of this kind: fn(cur, payload)."""
+    def decorator(fn):
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+def handlers():
+    return dict(_handlers)
+
+def enqueue(cur, kind, payload=None, delay=0, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Queue a job in the caller's transaction; returns its job_id."""
+    from psycopg2.extras import Json
+
+    cur.execute("""
+        INSERT INTO jobs (kind, payload, max_attempts, run_at)
+        VALUES (%s, %s, %s, CURRENT_TIMESTAMP + make_interval(secs => %s))
+        RETURNING job_id
+    """, (kind, Json(payload or {}), max_attempts, delay))
+    job_id = cur.fetchone()[0]
+    # Delivered on commit; wakes idle workers instead of waiting for a poll
+    cur.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, kind))
+    return job_id
+
+def claim(cur, worker_id, kinds, limit):
+    """Lock and return up to `limit` ready jobs of the given kinds."""
+    # Lost jobs that already used their last attempt never reach fail()
+    cur.execute("""
+        UPDATE jobs
+        SET status = 'dead', locked_by = NULL, finished_at = CURRENT_TIMESTAMP,
+            last_error = 'Worker ' || COALESCE(locked_by, '?') || ' was lost while running attempt '
+                         || attempts || '/' || max_attempts
+        WHERE kind = ANY(%s) AND status = 'running' AND attempts >= max_attempts
+          AND started_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+    """, (list(kinds), LOCK_TIMEOUT_SECONDS))
+    if cur.rowcount:
+        log.error('Marked %s lost jobs dead after their last attempt', cur.rowcount)
+    cur.execute("""
+        UPDATE jobs
+        SET status = 'running', attempts = attempts + 1,
+            locked_by = %s, started_at = CURRENT_TIMESTAMP
+        WHERE job_id IN (
+            SELECT job_id FROM jobs
+            WHERE kind = ANY(%s)
+              AND ((status = 'queued' AND run_at <= CURRENT_TIMESTAMP)
+                   OR (status = 'running' AND attempts < max_attempts
+                       AND started_at < CURRENT_TIMESTAMP - make_interval(secs => %s)))
+            ORDER BY run_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING job_id, kind, payload, attempts, max_attempts, run_at, started_at
+    """, (worker_id, list(kinds), LOCK_TIMEOUT_SECONDS, limit))
+    return sorted(map(Job._make, cur.fetchall()), key=lambda job: job.run_at)
+
+def complete(cur, job):
+    cur.execute("""
+        UPDATE jobs SET status = 'done', finished_at = CURRENT_TIMESTAMP, locked_by = NULL
+        WHERE job_id = %s
+    """, (job.job_id,))
+
+def retry_delay(attempts):
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    # Jitter so jobs that failed together do not retry together
+    return delay * random.uniform(0.8, 1.2)
+
+def fail(cur, job, error):
+    """Requeue a failed job with backoff, or mark it dead when out of attempts."""
+    dead = job.attempts >= job.max_attempts
+    cur.execute("""
+        UPDATE jobs
+        SET status = %s, last_error = %s, locked_by = NULL,
+            run_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+            finished_at = CASE WHEN %s THEN CURRENT_TIMESTAMP END
+        WHERE job_id = %s
+    """, ('dead' if dead else 'queued', f'{type(error).__name__}: {error}'[:2000],
+          0 if dead else retry_delay(job.attempts), dead, job.job_id))
+    return dead
+
+def run(job, get_connection):
+    """Run one claimed job; True if it succeeded."""
+    fn = _handlers.get(job.kind)
+    try:
+        if fn is None:
+            raise LookupError(f'No handler registered for job kind {job.kind!r}')
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                fn(cur, job.payload)
+                complete(cur, job)
+        return True
+    except Exception as e:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                dead = fail(cur, job, e)
+        log.log(logging.ERROR if dead else logging.WARNING,
+                'Job %s (%s) failed on attempt %s/%s%s: %s', job.job_id, job.kind,
+                job.attempts, job.max_attempts, ' and is now dead' if dead else '', e)
+        return False
+
+def requeue_dead(cur, kind=None):
+    """Give dead jobs a fresh set of attempts; returns how many were requeued."""
+    cur.execute("""
+        UPDATE jobs
+        SET status = 'queued', attempts = 0, run_at = CURRENT_TIMESTAMP, finished_at = NULL
+        WHERE status = 'dead' AND (%s::text IS NULL OR kind = %s)
+    """, (kind, kind))
+    return cur.rowcount
+
+def purge(cur, older_than_days):
+    """Delete finished jobs older than the retention window."""
+    cur.execute("""
+        DELETE FROM jobs
+        WHERE status = 'done'
+          AND finished_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+    """, (older_than_days,))
+    return cur.rowcount
+
+# Metrics
+
+QueueStats = namedtuple('QueueStats',
+    'kind queued ready running dead done_last_hour oldest_ready_seconds '
+    'wait_avg_seconds wait_p95_seconds')
+
+def stats(cur):
+    """Depth and latency per job kind.
+
+    ready counts queued jobs that are due now, and oldest_ready_seconds is how
+    long the oldest of them has been due (the current queue lag). The wait
+    figures cover jobs started in the last hour, measured from when they were
+    due until a worker picked them up.
+    """
+    cur.execute("""
+        SELECT kind,
+               count(*) FILTER (WHERE status = 'queued'),
+               count(*) FILTER (WHERE status = 'queued' AND run_at <= CURRENT_TIMESTAMP),
+               count(*) FILTER (WHERE status = 'running'),
+               count(*) FILTER (WHERE status = 'dead'),
+               count(*) FILTER (WHERE status = 'done'
+                                AND finished_at > CURRENT_TIMESTAMP - INTERVAL '1 hour'),
+               EXTRACT(EPOCH FROM CURRENT_TIMESTAMP - min(run_at)
+                       FILTER (WHERE status = 'queued' AND run_at <= CURRENT_TIMESTAMP)),
+               EXTRACT(EPOCH FROM avg(started_at - run_at)
+                       FILTER (WHERE started_at > CURRENT_TIMESTAMP - INTERVAL '1 hour')),
+               EXTRACT(EPOCH FROM percentile_cont(0.95) WITHIN GROUP (ORDER BY started_at - run_at)
+                       FILTER (WHERE started_at > CURRENT_TIMESTAMP - INTERVAL '1 hour'))
+        FROM jobs
+        GROUP BY kind
+        ORDER BY kind
+    """)
+    return list(map(QueueStats._make, cur.fetchall()))
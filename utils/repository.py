@@ -0,0 +1,253 @@
+"""
+Read queries and the compact row types they return.
+
+Each query selects only the columns its page needs, in the order of the
+row type's fields, and rows are built straight from psycopg2's tuples. Row
+types are namedtuples with empty __slots__, so a row costs one tuple rather
+than a dict of every column, and derived values such as final_price are
+properties computed on access instead of being written back into the row.
+All functions take an open cursor so callers control the transaction.
+
+The hottest queries are registered as prepared statements (utils/statements.py)
+and run via EXECUTE on connections that have already prepared them.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from utils import statements
+
+class Row:
+    """Mixin for row types: JSON-ready dict including derived fields."""
+    __slots__ = ()
+    _derived = ()
+
+    def to_dict(self):
+        data = self._asdict()
+        for name in self._derived:
+            data[name] = getattr(self, name)
+        return data
+
+def _execute(cur, query, params):
+    if isinstance(query, statements.Statement):
+        statements.execute(cur, query, params or ())
+    else:
+        cur.execute(query, params)
+
+def _fetch_all(cur, row_type, query, params=None):
+    _execute(cur, query, params)
+    return list(map(row_type._make, cur.fetchall()))
+
+def _fetch_one(cur, row_type, query, params=None):
+    _execute(cur, query, params)
+    row = cur.fetchone()
+    return row_type._make(row) if row is not None else None
+
+# Users
+
+class UserCredentials(Row, namedtuple('UserCredentials',
+        'user_id full_name mobile password_hash')):
+    __slots__ = ()
+
+class UserProfile(Row, namedtuple('UserProfile',
+        'user_id full_name mobile email profile_pic_url location_lat location_lng registered_at')):
+    __slots__ = ()
+
+_USER_BY_MOBILE = statements.register('user_by_mobile', """
+    SELECT user_id, full_name, mobile, password_hash
+    FROM users WHERE mobile = %s
+""")
+
+def get_user_credentials(cur, mobile):
+    return _fetch_one(cur, UserCredentials, _USER_BY_MOBILE, (mobile,))
+
+def get_user_profile(cur, user_id):
+    return _fetch_one(cur, UserProfile, """
+        SELECT user_id, full_name, mobile, email, profile_pic_url,
+               location_lat, location_lng, registered_at
+        FROM users WHERE user_id = %s
+    """, (user_id,))
+
+# Catalog
+
+class PricedRow(Row):
+    __slots__ = ()
+    _derived = ('final_price',)
+
+    @property
+    def final_price(self):
+        return float(self.base_price) - float(self.discount or 0)
+
+# List pages only show the first 100 characters of a description, so list rows
+# carry description_preview instead of the full text. One extra character is
+# fetched so the template (or a JSON client) can tell whether to add "...".
+DESCRIPTION_PREVIEW = 101
+
+class ServiceSummary(PricedRow, namedtuple('ServiceSummary',
+        'service_id version service_name base_price discount image_url description_preview '
+        'added_at available_until')):
+    __slots__ = ()
+
+class ServiceItem(Row, namedtuple('ServiceItem',
+        'item_id item_name item_price item_image_url item_description serial_no')):
+    __slots__ = ()
+
+class ServiceDetail(PricedRow, namedtuple('ServiceDetail',
+        'service_id version service_name category base_price discount image_url description '
+        'added_at available_until items')):
+    __slots__ = ()
+
+    def to_dict(self):
+        data = super().to_dict()
+        data['items'] = [item.to_dict() for item in self.items]
+        return data
+
+class MenuItem(PricedRow, namedtuple('MenuItem',
+        'menu_id item_name base_price discount image_url description_preview added_at')):
+    __slots__ = ()
+
+_SERVICES_CATALOG = statements.register('services_catalog', """
+    SELECT service_id, version, service_name, base_price, discount, image_url,
+           LEFT(description, %s), added_at, available_until
+    FROM services
+    WHERE is_active = TRUE
+    ORDER BY added_at DESC
+""")
+
+def list_services(cur):
+    return _fetch_all(cur, ServiceSummary, _SERVICES_CATALOG, (DESCRIPTION_PREVIEW,))
+
+# Services with their items in one round trip. Items are aggregated as JSON
+# (prices as text so they come back as exact Decimals, like every other price).
+_SERVICE_DETAILS = statements.register('service_details', """
+    SELECT s.service_id, s.version, s.service_name, s.category, s.base_price, s.discount,
+           s.image_url, s.description, s.added_at, s.available_until,
+           COALESCE(json_agg(json_build_object(
+                        'item_id', i.item_id, 'item_name', i.item_name,
+                        'item_price', i.item_price::text, 'item_image_url', i.item_image_url,
+                        'item_description', i.item_description, 'serial_no', i.serial_no)
+                    ORDER BY i.serial_no) FILTER (WHERE i.item_id IS NOT NULL),
+                    '[]')
+    FROM services s
+    LEFT JOIN service_items i ON i.service_id = s.service_id
+    WHERE s.service_id = ANY(%s)
+    GROUP BY s.service_id
+""")
+
+def _service_item(data):
+    price = data['item_price']
+    return ServiceItem(**dict(data, item_price=Decimal(price) if price is not None else None))
+
+def get_service_details(cur, service_ids):
+    """Several services with their items, as {service_id: ServiceDetail}."""
+    if not service_ids:
+        return {}
+    _execute(cur, _SERVICE_DETAILS, (list(service_ids),))
+    return {row[0]: ServiceDetail._make(row[:-1] + (tuple(map(_service_item, row[-1])),))
+            for row in cur.fetchall()}
+
+_MENU_CATALOG = statements.register('menu_catalog', """
+    SELECT menu_id, item_name, base_price, discount, image_url,
+           LEFT(description, %s), added_at
+    FROM menu_items
+    WHERE is_available = TRUE
+    ORDER BY serial_no
+""")
+
+def list_menu_items(cur):
+    return _fetch_all(cur, MenuItem, _MENU_CATALOG, (DESCRIPTION_PREVIEW,))
+
+# Cart
+
+class CartLine(Row, namedtuple('CartLine',
+        'cart_id item_type service_id menu_id quantity name image_url base_price discount')):
+    __slots__ = ()
+    _derived = ('unit_price', 'line_total')
+
+    @property
+    def unit_price(self):
+        return float(self.base_price) - float(self.discount or 0)
+
+    @property
+    def line_total(self):
+        return self.unit_price * self.quantity
+
+_CART_LINES = statements.register('cart_lines', """
+    SELECT c.cart_id, c.item_type, c.service_id, c.menu_id, c.quantity,
+           COALESCE(s.service_name, m.item_name),
+           COALESCE(s.image_url, m.image_url),
+           COALESCE(s.base_price, m.base_price),
+           COALESCE(s.discount, m.discount)
+    FROM cart c
+    LEFT JOIN services s ON c.service_id = s.service_id AND c.item_type = 'service'
+    LEFT JOIN menu_items m ON c.menu_id = m.menu_id AND c.item_type = 'menu'
+    WHERE c.user_id = %s
+    ORDER BY c.added_at DESC
+""")
+
+def list_cart(cur, user_id):
+    return _fetch_all(cur, CartLine, _CART_LINES, (user_id,))
+
+# Orders
+
+CURRENT_ORDER_STATUSES = ('pending', 'preparing', 'delivery')
+PAST_ORDER_STATUSES = ('delivered', 'cancelled')
+
+class Order(Row, namedtuple('Order',
+        'order_id order_date status total_amount payment_method payment_status delivery_lat delivery_lng')):
+    __slots__ = ()
+
+class OrderLine(Row, namedtuple('OrderLine',
+        'order_id item_type quantity price_at_time name image_url')):
+    __slots__ = ()
+    _derived = ('line_total',)
+
+    @property
+    def line_total(self):
+        return self.price_at_time * self.quantity
+
+_ORDERS_BY_USER = statements.register('orders_by_user', """
+    SELECT order_id, order_date, status, total_amount, payment_method,
+           payment_status, delivery_lat, delivery_lng
+    FROM orders
+    WHERE user_id = %s AND status = ANY(%s)
+    ORDER BY order_date DESC
+""")
+
+def list_orders(cur, user_id):
+    statuses = list(CURRENT_ORDER_STATUSES + PAST_ORDER_STATUSES)
+    return _fetch_all(cur, Order, _ORDERS_BY_USER, (user_id, statuses))
+
+_ORDER_LINES = statements.register('order_lines', """
+    SELECT oi.order_id, oi.item_type, oi.quantity, oi.price_at_time,
+           COALESCE(s.service_name, m.item_name),
+           COALESCE(s.image_url, m.image_url)
+    FROM order_items oi
+    LEFT JOIN services s ON oi.service_id = s.service_id AND oi.item_type = 'service'
+    LEFT JOIN menu_items m ON oi.menu_id = m.menu_id AND oi.item_type = 'menu'
+    WHERE oi.order_id = ANY(%s)
+""")
+
+def list_order_lines(cur, order_ids):
+    """Items for several orders at once, grouped into {order_id: [OrderLine]}."""
+    if not order_ids:
+        return {}
+    lines = _fetch_all(cur, OrderLine, _ORDER_LINES, (list(order_ids),))
+    by_order = {}
+    for line in lines:
+        by_order.setdefault(line.order_id, []).append(line)
+    return by_order
+
+# Messages
+
+class Message(Row, namedtuple('Message',
+        'message_id sender_name message_text message_image sent_at')):
+    __slots__ = ()
+
+def list_active_messages(cur, limit=5):
+    return _fetch_all(cur, Message, """
+        SELECT message_id, sender_name, message_text, message_image, sent_at
+        FROM messages
+        WHERE is_active = TRUE
+        ORDER BY sent_at DESC
+        LIMIT %s
+    """, (limit,))
@@ -0,0 +1,119 @@
+"""
+Server-side prepared statements for the hot queries.
+
+Hot statements are registered once at import time with ordinary %s
+placeholders. The first time a pooled connection runs one it is sent as
+PREPARE, and every later call on that connection is a short EXECUTE, so
+Postgres skips parsing and (after a few runs) planning.
+
+Which statements a connection has prepared is tracked per connection object,
+so a connection the pool replaces after a reconnect simply starts empty and
+prepares again. Statement names carry a hash of their SQL, so editing a query
+never collides with an older prepared version. If the server no longer knows
+a statement (DISCARD ALL, a pooler in front of Postgres) or a schema change
+altered its result columns, the statement is re-prepared and retried once
+when that can be done without losing earlier work in the transaction.
+
+Set DB_PREPARED_STATEMENTS=0 to send plain queries instead (e.g. behind
+PgBouncer in transaction pooling mode).
+"""
+import os
+import re
+import weakref
+import zlib
+
+def enabled():
+    # Read on every call rather than at import: app.py and worker.py import
+    # this module before load_dotenv() has put .env into the environment.
+    return os.environ.get('DB_PREPARED_STATEMENTS', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+# SQLSTATEs that mean "prepare it again": invalid_sql_statement_name (the
+# server forgot it) and feature_not_supported ("cached plan must not change
+# result type" after an ALTER TABLE).
+REPREPARE_ERRORS = ('26000', '0A000')
+
+class Statement:
+    """A named query that is PREPAREd on first use per connection."""
+    __slots__ = ('name', 'sql', 'prepare_sql', 'execute_sql')
+
+    def __init__(self, name, sql):
+        nparams = sql.count('%s')
+        counter = iter(range(1, nparams + 1))
+        self.name = f'{name}_{zlib.crc32(sql.encode()):08x}'
+        self.sql = sql
+        self.prepare_sql = f'PREPARE {self.name} AS ' + re.sub(r'%s', lambda m: f'${next(counter)}', sql)
+        self.execute_sql = f'EXECUTE {self.name}' + (f' ({", ".join(["%s"] * nparams)})' if nparams else '')
+
+    def __repr__(self):
+        return f'<Statement {self.name}>'
+
+_registry = {}
+
+def register(name, sql):
+    if name in _registry:
+        raise ValueError(f'Statement {name!r} is already registered')
+    statement = _registry[name] = Statement(name, sql)
+    return statement
+
+def registered():
+    return dict(_registry)
+
+class _ConnectionState:
+    __slots__ = ('prepared', 'stale')
+
+    def __init__(self):
+        self.prepared = set()
+        self.stale = set()
+
+# connection -> _ConnectionState; entries vanish with their connection
+_connections = weakref.WeakKeyDictionary()
+
+def _state(conn):
+    state = _connections.get(conn)
+    if state is None:
+        state = _connections[conn] = _ConnectionState()
+    return state
+
+def _run(cur, statement, params, state):
+    if statement.name not in state.prepared:
+        if statement.name in state.stale:
+            # Forget it first: if the server already dropped the statement,
+            # DEALLOCATE fails with 26000 and the retry must go straight to PREPARE
+            state.stale.discard(statement.name)
+            cur.execute(f'DEALLOCATE {statement.name}')
+        cur.execute(statement.prepare_sql)
+        state.prepared.add(statement.name)
+    cur.execute(statement.execute_sql, params)
+
+def execute(cur, statement, params=()):
+    """Run a registered statement on cur, preparing it on this connection if needed."""
+    if not enabled():
+        cur.execute(statement.sql, params)
+        return
+
+    from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+    conn = cur.connection
+    state = _state(conn)
+    # Only a statement that opens the transaction can be safely retried:
+    # rolling back then discards nothing but the failed attempt.
+    first_in_transaction = conn.get_transaction_status() == TRANSACTION_STATUS_IDLE
+    try:
+        _run(cur, statement, params, state)
+    except Exception as e:
+        code = getattr(e, 'pgcode', None)
+        if code not in REPREPARE_ERRORS or (code == '0A000' and 'cached plan' not in str(e)):
+            raise
+        state.prepared.discard(statement.name)
+        if code == '0A000':
+            state.stale.add(statement.name)
+        if not first_in_transaction:
+            raise
+        conn.rollback()
+        _run(cur, statement, params, state)
+
+def invalidate(conn):
+    """Forget everything prepared on conn, e.g. after running migrations."""
+    with conn.cursor() as cur:
+        cur.execute('DEALLOCATE ALL')
+    _connections.pop(conn, None)
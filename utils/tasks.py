@@ -0,0 +1,80 @@
+"""
+Background job handlers.
+
+Each handler takes (cur, payload) and runs inside the transaction that also
+marks its job done, so its database writes and follow-up jobs commit (or roll
+back) together with the job. Work outside the database, such as rewriting a
+file, must be safe to repeat: a job whose worker dies is run again.
+"""
+import os
+
+from utils import jobs
+
+# Uploaded profile pictures are downscaled to fit this box and saved as JPEG
+PROFILE_PIC_SIZE = (512, 512)
+
+# Order status flow, and for each step the setting and default number of
+# seconds it takes to reach it from the one before
+ORDER_FLOW = ('pending', 'preparing', 'delivery', 'delivered')
+ORDER_STEP_SECONDS = {
+    'preparing': ('ORDER_PREPARING_AFTER', 60),
+    'delivery': ('ORDER_DELIVERY_AFTER', 15 * 60),
+    'delivered': ('ORDER_DELIVERED_AFTER', 30 * 60),
+}
+
+def order_step_seconds(status):
+    # Read when scheduling, not at import: .env is only loaded after this
+    # module has been imported by app.py and worker.py
+    name, default = ORDER_STEP_SECONDS[status]
+    return int(os.environ.get(name, default))
+
+def upload_folder():
+    import config
+    return config.UPLOAD_FOLDER
+
+@jobs.handler('process_profile_pic')
+def process_profile_pic(cur, payload):
+    """Normalize an uploaded profile picture in place: orientation, size, JPEG."""
+    from PIL import Image, ImageOps
+
+    path = os.path.join(upload_folder(), os.path.basename(payload['filename']))
+    if not os.path.exists(path):
+        # The picture is rewritten in place, so a missing file means this worker
+        # cannot see the web process's uploads. Fail so the job ends up dead
+        # instead of being marked done without doing anything.
+        raise FileNotFoundError(f'{path} not found; the worker needs the same '
+                                f'UPLOAD_FOLDER storage as the web process')
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        image.thumbnail(PROFILE_PIC_SIZE)
+        tmp_path = path + '.tmp'
+        image.save(tmp_path, 'JPEG', quality=85, optimize=True)
+    os.replace(tmp_path, path)
+
+def schedule_order_step(cur, order_id, current_status='pending'):
+    """Queue the move from current_status to the next status in ORDER_FLOW."""
+    index = ORDER_FLOW.index(current_status)
+    if index + 1 < len(ORDER_FLOW):
+        next_status = ORDER_FLOW[index + 1]
+        jobs.enqueue(cur, 'advance_order',
+                     {'order_id': order_id, 'from': current_status, 'to': next_status},
+                     delay=order_step_seconds(next_status))
+
+@jobs.handler('advance_order')
+def advance_order(cur, payload):
+    # Only moves forward from the expected status, so a retried job or an
+    # order cancelled in the meantime is left alone.
+    cur.execute("""
+        UPDATE orders SET status = %s
+        WHERE order_id = %s AND status = %s
+    """, (payload['to'], payload['order_id'], payload['from']))
+    if cur.rowcount:
+        schedule_order_step(cur, payload['order_id'], payload['to'])
+
+@jobs.handler('announce')
+def announce(cur, payload):
+    cur.execute("""
+        INSERT INTO messages (sender_name, message_text, message_image)
+        VALUES (%s, %s, %s)
+    """, (payload.get('sender_name', 'BiteMeBuddy'), payload['message_text'],
+          payload.get('message_image')))
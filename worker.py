@@ -0,0 +1,207 @@
+"""
+Background job worker.
+
+    python worker.py                      # run until SIGTERM/SIGINT
+    python worker.py --once               # drain ready jobs, then exit
+    python worker.py stats                # queue depth and latency per kind
+    python worker.py announce "Free delivery today!" [--delay 3600]
+    python worker.py requeue-dead [--kind advance_order]
+
+Workers claim jobs in batches with FOR UPDATE SKIP LOCKED (see utils/jobs.py),
+so several can run side by side. Idle workers sleep on LISTEN jobs and wake as
+soon as a job is enqueued, with --poll as a fallback for delayed jobs.
+"""
+import argparse
+import logging
+import os
+import select
+import signal
+import socket
+import time
+
+from utils import jobs, tasks  # noqa: F401  (tasks registers the handlers)
+from utils.database import get_db_connection, init_pool
+
+log = logging.getLogger('worker')
+
+# Finished jobs are deleted after this many days (JOB_RETENTION_DAYS)
+DEFAULT_JOB_RETENTION_DAYS = 7
+PURGE_INTERVAL_SECONDS = 3600
+# How often to retry the LISTEN connection while falling back to polling
+LISTEN_RETRY_SECONDS = 30
+STATS_INTERVAL_SECONDS = 60
+
+class Worker:
+    def __init__(self, kinds, batch_size, poll_interval, retention_days=DEFAULT_JOB_RETENTION_DAYS):
+        self.kinds = kinds
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention_days = retention_days
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.running = True
+        self.listener = None
+        self.next_listen = 0
+        self.processed = 0
+        self.failed = 0
+
+    def stop(self, *args):
+        log.info('Stopping after the current batch')
+        self.running = False
+
+    def listen(self):
+        """Open the LISTEN connection; on failure, fall back to polling for now."""
+        import psycopg2
+
+        self.next_listen = time.monotonic() + LISTEN_RETRY_SECONDS
+        try:
+            self.listener = psycopg2.connect(os.environ.get('DATABASE_URL'))
+            self.listener.autocommit = True
+            with self.listener.cursor() as cur:
+                cur.execute(f'LISTEN {jobs.NOTIFY_CHANNEL}')
+        except psycopg2.Error as e:
+            log.warning('LISTEN unavailable, polling every %ss: %s', self.poll_interval, e)
+            self.close_listener()
+
+    def close_listener(self):
+        if self.listener is not None:
+            try:
+                self.listener.close()
+            except Exception:
+                pass
+            self.listener = None
+
+    def wait(self):
+        """Sleep until a job is enqueued or the poll interval passes."""
+        import psycopg2
+
+        if self.listener is None and time.monotonic() >= self.next_listen:
+            self.listen()
+        if self.listener is None:
+            time.sleep(self.poll_interval)
+            return
+        try:
+            if select.select([self.listener], [], [], self.poll_interval)[0]:
+                self.listener.poll()
+                self.listener.notifies.clear()
+        except (psycopg2.Error, OSError, ValueError) as e:
+            # Dropped connection; poll until listen() succeeds again
+            log.warning('LISTEN connection lost, reconnecting: %s', e)
+            self.close_listener()
+
+    def run_batch(self):
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                batch = jobs.claim(cur, self.worker_id, self.kinds, self.batch_size)
+        for job in batch:
+            start = time.perf_counter()
+            ok = jobs.run(job, get_db_connection)
+            self.processed += ok
+            self.failed += not ok
+            log.debug('Job %s (%s) %s in %.0f ms', job.job_id, job.kind,
+                      'done' if ok else 'failed', (time.perf_counter() - start) * 1000)
+        return len(batch)
+
+    def log_stats(self):
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                rows = jobs.stats(cur)
+        for row in rows:
+            log.info('queue %s: ready=%s queued=%s running=%s dead=%s lag=%.1fs wait_p95=%.1fs',
+                     row.kind, row.ready, row.queued, row.running, row.dead,
+                     row.oldest_ready_seconds or 0, row.wait_p95_seconds or 0)
+        log.info('worker %s: processed=%s failed=%s', self.worker_id, self.processed, self.failed)
+
+    def purge(self):
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                removed = jobs.purge(cur, self.retention_days)
+        if removed:
+            log.info('Purged %s finished jobs', removed)
+
+    def run_forever(self, once=False):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if not once:
+            self.listen()
+        log.info('Worker %s handling %s', self.worker_id, ', '.join(self.kinds))
+
+        next_stats = next_purge = time.monotonic()
+        while self.running:
+            try:
+                claimed = self.run_batch()
+                now = time.monotonic()
+                if not once and now >= next_stats:
+                    self.log_stats()
+                    next_stats = now + STATS_INTERVAL_SECONDS
+                if not once and now >= next_purge:
+                    self.purge()
+                    next_purge = now + PURGE_INTERVAL_SECONDS
+                if claimed == 0:
+                    if once:
+                        break
+                    self.wait()
+            except Exception:
+                log.exception('Worker loop error; backing off')
+                time.sleep(self.poll_interval)
+        self.close_listener()
+
+def print_stats():
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            rows = jobs.stats(cur)
+    print(f'{"kind":<22}{"ready":>7}{"queued":>8}{"running":>9}{"dead":>6}{"done/1h":>9}'
+          f'{"lag s":>9}{"wait avg":>10}{"wait p95":>10}')
+    for row in rows:
+        print(f'{row.kind:<22}{row.ready:>7}{row.queued:>8}{row.running:>9}{row.dead:>6}'
+              f'{row.done_last_hour:>9}{float(row.oldest_ready_seconds or 0):>9.1f}'
+              f'{float(row.wait_avg_seconds or 0):>10.1f}{float(row.wait_p95_seconds or 0):>10.1f}')
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='BiteMeBuddy background job worker')
+    parser.add_argument('--kinds', default=','.join(sorted(jobs.handlers())),
+                        help='comma-separated job kinds to handle (default: all)')
+    parser.add_argument('--batch-size', type=int, default=int(os.environ.get('WORKER_BATCH_SIZE', 10)))
+    parser.add_argument('--poll', type=float, default=float(os.environ.get('WORKER_POLL_SECONDS', 5)),
+                        help='seconds between polls when idle')
+    parser.add_argument('--retention-days', type=int,
+                        default=int(os.environ.get('JOB_RETENTION_DAYS', DEFAULT_JOB_RETENTION_DAYS)),
+                        help='delete finished jobs after this many days')
+    parser.add_argument('--once', action='store_true', help='drain ready jobs and exit')
+    parser.add_argument('--log-level', default=os.environ.get('WORKER_LOG_LEVEL', 'INFO'))
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('stats', help='print queue depth and latency per job kind')
+    announce = commands.add_parser('announce', help='queue an announcement message')
+    announce.add_argument('text')
+    announce.add_argument('--sender', default='BiteMeBuddy')
+    announce.add_argument('--image')
+    announce.add_argument('--delay', type=int, default=0, help='seconds until it is posted')
+    requeue = commands.add_parser('requeue-dead', help='retry dead jobs')
+    requeue.add_argument('--kind')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(),
+                        format='%(asctime)s [%(process)d] [%(levelname)s] %(name)s: %(message)s')
+    init_pool(minconn=1, maxconn=2)
+
+    if args.command == 'stats':
+        print_stats()
+    elif args.command == 'announce':
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                job_id = jobs.enqueue(cur, 'announce', {
+                    'sender_name': args.sender, 'message_text': args.text,
+                    'message_image': args.image}, delay=args.delay)
+        print(f'Queued announcement as job {job_id}')
+    elif args.command == 'requeue-dead':
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                print(f'Requeued {jobs.requeue_dead(cur, args.kind)} dead jobs')
+    else:
+        kinds = [kind.strip() for kind in args.kinds.split(',') if kind.strip()]
+        Worker(kinds, args.batch_size, args.poll, args.retention_days).run_forever(once=args.once)
+
+if __name__ == '__main__':
+    main()